@@ -0,0 +1,303 @@
+import time
+import csv
+import json
+import os
+from datetime import datetime
+
+LOG_FILE = "deepwork_log.csv"
+CONFIG_FILE = "config.json"
+
+# Journal v2 : ligne "#v2", puis en-tête et lignes à 5 colonnes
+# (epochs de début/fin, durée réelle (s), phase, session terminée ou arrêtée)
+LOG_VERSION = "#v2"
+LOG_COLUMNS = ["start", "end", "seconds", "phase", "completed"]
+PHASE_WORK = "work"
+PHASE_BREAK = "break"
+PHASE_LABELS = {PHASE_WORK: "Travail", PHASE_BREAK: "Repos"}
+LEGACY_PHASES = {"Travail": PHASE_WORK, "Repos": PHASE_BREAK}
+STATS_COLORS = {PHASE_WORK: "#924040", PHASE_BREAK: "#3713af", "stopped": "#999999"}
+
+# Couleurs par défaut
+DEFAULT_COLORS = {
+    "work_bg": "#924040",   # Rouge
+    "work_btn": "#556027",  # Vert
+    "break_bg": "#3713af",  # Bleu
+    "btn_text": "#ffffff"
+}
+
+# Horloge réelle (injectable pour la simulation)
+class TkClock:
+    def __init__(self, root):
+        self.root = root
+
+    def now(self):
+        return time.time()
+
+    def after(self, ms, callback):
+        return self.root.after(ms, callback)
+
+    def cancel(self, after_id):
+        self.root.after_cancel(after_id)
+
+# Charger ou créer config
+def load_config(path=CONFIG_FILE):
+    try:
+        with open(path, "r") as f:
+            config = json.load(f)
+    except FileNotFoundError:
+        config = {"work_minutes": 25, "break_minutes": 5, "colors": DEFAULT_COLORS, "theme": "dark", "mini_alpha": 1.0}
+    if "colors" not in config:
+        config["colors"] = DEFAULT_COLORS.copy()
+    if "theme" not in config:
+        config["theme"] = "dark"
+    if "mini_alpha" not in config:
+        config["mini_alpha"] = 1.0
+    return config
+
+def save_config(config, path=CONFIG_FILE):
+    with open(path, "w") as f:
+        json.dump(config, f, indent=4)
+
+# Convertir une ligne v1 (date locale, phase, minutes prévues) ou v2 en enregistrement
+# Les lignes illisibles (ex. ligne tronquée après un crash) sont ignorées : None
+def parse_log_row(row):
+    if not row or row == [LOG_VERSION] or row == LOG_COLUMNS:
+        return None
+    try:
+        if len(row) == 3:
+            end = int(datetime.strptime(row[0], "%Y-%m-%d %H:%M:%S").timestamp())
+            seconds = int(row[2]) * 60
+            return {"start": end - seconds, "end": end, "seconds": seconds,
+                    "phase": LEGACY_PHASES[row[1]], "completed": True}
+        if len(row) == 5 and row[3] in PHASE_LABELS:
+            return {"start": int(row[0]), "end": int(row[1]), "seconds": int(row[2]),
+                    "phase": row[3], "completed": row[4] == "1"}
+    except (ValueError, KeyError):
+        pass
+    return None
+
+def format_log_row(record):
+    return [record["start"], record["end"], record["seconds"], record["phase"],
+            1 if record["completed"] else 0]
+
+# Lire l'historique ligne par ligne, v1 et v2 mélangées
+def iter_log(path=LOG_FILE):
+    try:
+        f = open(path, "r", newline="")
+    except FileNotFoundError:
+        return
+    with f:
+        for row in csv.reader(f):
+            record = parse_log_row(row)
+            if record:
+                yield record
+
+# Barres du graphique de statistiques : libellé, durée (min) et couleur par session
+# Les sessions arrêtées avant la fin sont grisées
+def session_stats(records):
+    labels = []
+    durations = []
+    colors = []
+    for r in records:
+        label = PHASE_LABELS.get(r["phase"], r["phase"])
+        labels.append(label if r["completed"] else f"{label} (arrêt)")
+        durations.append(r["seconds"] / 60)
+        colors.append(STATS_COLORS[r["phase"]] if r["completed"] else STATS_COLORS["stopped"])
+    return labels, durations, colors
+
+def append_log(record, path=LOG_FILE):
+    # Une ligne tronquée ne doit pas avaler la suivante
+    try:
+        with open(path, "rb") as f:
+            f.seek(-1, os.SEEK_END)
+            broken = f.read(1) != b"\n"
+    except OSError:
+        broken = False
+    with open(path, "a", newline="") as f:
+        writer = csv.writer(f)
+        if f.tell() == 0:
+            writer.writerow([LOG_VERSION])
+            writer.writerow(LOG_COLUMNS)
+        elif broken:
+            f.write("\n")
+        writer.writerow(format_log_row(record))
+
+# Migration du journal vers v2 en mémoire constante, reprise possible après interruption
+# (arrêt brutal, Ctrl-C) ; en cas d'erreur, les fichiers temporaires sont supprimés
+def upgrade_log(path=LOG_FILE, batch=1000, progress=None):
+    tmp_path = path + ".v2.tmp"
+    state_path = path + ".upgrade"
+    if not os.path.exists(path):
+        return False
+    try:
+        return _convert_log(path, tmp_path, state_path, batch, progress)
+    except Exception:
+        for leftover in (tmp_path, state_path, state_path + ".tmp"):
+            if os.path.exists(leftover):
+                os.remove(leftover)
+        raise
+
+# Point de reprise : illisible ou incohérent (ex. écriture coupée) -> repartir de zéro
+def _read_checkpoint(path, tmp_path, state_path):
+    try:
+        with open(state_path, "r") as f:
+            state = json.load(f)
+        src, dst = int(state["src"]), int(state["dst"])
+        if 0 <= src <= os.path.getsize(path) and 0 <= dst <= os.path.getsize(tmp_path):
+            return {"src": src, "dst": dst}
+    except (OSError, ValueError, KeyError, TypeError):
+        pass
+    return {"src": 0, "dst": 0}
+
+def _write_checkpoint(state_path, state):
+    tmp_state = state_path + ".tmp"
+    with open(tmp_state, "w") as f:
+        json.dump(state, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_state, state_path)
+
+# Journal entièrement v2 : ligne "#v2" en tête et aucune ligne v1 ajoutée ensuite
+# (les anciens scripts écrivent encore des lignes v1 dans le même fichier)
+def _is_v2_log(src):
+    if src.readline().rstrip("\r\n") != LOG_VERSION:
+        return False
+    while True:
+        line = src.readline()
+        if not line:
+            break
+        row = next(csv.reader([line]), [])
+        if len(row) == 3 and parse_log_row(row):
+            return False
+    return True
+
+def _convert_log(path, tmp_path, state_path, batch, progress):
+    with open(path, "r", newline="") as src:
+        if _is_v2_log(src):
+            return False
+
+        # Reprendre là où la dernière migration s'est arrêtée
+        state = {"src": 0, "dst": 0}
+        if os.path.exists(state_path) and os.path.exists(tmp_path):
+            state = _read_checkpoint(path, tmp_path, state_path)
+
+        with open(tmp_path, "a+", newline="") as dst:
+            dst.truncate(state["dst"])
+            dst.seek(state["dst"])
+            writer = csv.writer(dst)
+            if state["dst"] == 0:
+                writer.writerow([LOG_VERSION])
+                writer.writerow(LOG_COLUMNS)
+            src.seek(state["src"])
+            count = 0
+            while True:
+                line = src.readline()
+                if not line:
+                    break
+                record = parse_log_row(next(csv.reader([line]), []))
+                if record:
+                    writer.writerow(format_log_row(record))
+                count += 1
+                if count % batch == 0:
+                    dst.flush()
+                    os.fsync(dst.fileno())
+                    _write_checkpoint(state_path, {"src": src.tell(), "dst": dst.tell()})
+                    if progress:
+                        progress(count)
+            dst.flush()
+            os.fsync(dst.fileno())
+
+    # Remplacement atomique de l'ancien journal
+    os.replace(tmp_path, path)
+    if os.path.exists(state_path):
+        os.remove(state_path)
+    return True
+
+# Réglage en minutes, remplacé par un IntVar dans l'interface
+class MinutesVar:
+    def __init__(self, value):
+        self.value = value
+
+    def get(self):
+        return self.value
+
+    def set(self, value):
+        self.value = value
+
+# Logique du minuteur sans interface : phases, échéances et journal
+class TimerCore:
+    def __init__(self, clock, config_file=CONFIG_FILE, log_file=LOG_FILE, config=None):
+        self.clock = clock
+        self.config_file = config_file
+        self.log_file = log_file
+        self.config = config if config is not None else load_config(config_file)
+        self.work_minutes = MinutesVar(self.config["work_minutes"])
+        self.break_minutes = MinutesVar(self.config["break_minutes"])
+        self.remaining_time = 0
+        self.total_time = 0
+        self.is_running = False
+        self.is_work_phase = True
+        self.phase_start = 0
+        self.phase_end = 0
+        self.after_id = None
+
+    # Affichage : sans effet ici, redéfini par l'interface
+    def show_time(self, percent, time_str="00:00"):
+        pass
+
+    def apply_theme(self):
+        pass
+
+    def notify_phase_end(self):
+        pass
+
+    def start_timer(self):
+        if not self.is_running:
+            self.is_running = True
+            minutes = self.work_minutes.get() if self.is_work_phase else self.break_minutes.get()
+            self.remaining_time = minutes * 60
+            self.total_time = self.remaining_time
+            # Échéance absolue : pas de dérive si les ticks arrivent en retard
+            self.phase_start = self.clock.now()
+            self.phase_end = self.phase_start + self.total_time
+            self.config["work_minutes"] = self.work_minutes.get()
+            self.config["break_minutes"] = self.break_minutes.get()
+            save_config(self.config, self.config_file)
+            self.update_timer()
+
+    def stop_timer(self):
+        if self.is_running:
+            self.log_session(completed=False)
+        self.is_running = False
+        # Annuler le tick en attente, sinon un redémarrage rapide lance deux boucles
+        if self.after_id is not None:
+            self.clock.cancel(self.after_id)
+            self.after_id = None
+        self.show_time(0)
+
+    def update_timer(self):
+        self.after_id = None
+        if not self.is_running:
+            return
+        self.remaining_time = max(0, round(self.phase_end - self.clock.now()))
+        if self.remaining_time > 0:
+            mins, secs = divmod(self.remaining_time, 60)
+            percent = self.remaining_time / self.total_time
+            self.show_time(percent, f"{mins:02d}:{secs:02d}")
+            # Viser la prochaine seconde pleine avant l'échéance
+            delay = (self.phase_end - self.clock.now()) - (self.remaining_time - 1)
+            self.after_id = self.clock.after(max(1, int(delay * 1000)), self.update_timer)
+        else:
+            self.log_session()
+            self.is_work_phase = not self.is_work_phase
+            self.apply_theme()
+            self.notify_phase_end()
+            self.is_running = False
+            self.start_timer()
+
+    def log_session(self, completed=True):
+        start = round(self.phase_start)
+        end = round(self.clock.now())
+        append_log({"start": start, "end": end, "seconds": end - start,
+                    "phase": PHASE_WORK if self.is_work_phase else PHASE_BREAK,
+                    "completed": completed}, self.log_file)
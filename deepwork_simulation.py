@@ -0,0 +1,290 @@
+import argparse
+import heapq
+import os
+import random
+import shutil
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from deepwork_core import (PHASE_BREAK, PHASE_WORK, TimerCore, append_log, iter_log, session_stats,
+                           upgrade_log)
+
+
+# Horloge virtuelle : file d'événements, le temps saute d'un événement au suivant
+class VirtualClock:
+    def __init__(self, start, jitter_ms=0, seed=0):
+        self.current = start
+        self.jitter_ms = jitter_ms
+        self.rng = random.Random(seed)
+        self.queue = []
+        self.cancelled = set()
+        self.counter = 0
+        self.on_fire = None
+
+    def now(self):
+        return self.current
+
+    def after(self, ms, callback):
+        # Retard aléatoire pour imiter un root.after() chargé
+        delay = ms + (self.rng.uniform(0, self.jitter_ms) if self.jitter_ms else 0)
+        self.counter += 1
+        heapq.heappush(self.queue, (self.current + delay / 1000, self.counter, callback))
+        return self.counter
+
+    def cancel(self, after_id):
+        self.cancelled.add(after_id)
+
+    def run_until(self, deadline):
+        while self.queue and self.queue[0][0] <= deadline:
+            when, after_id, callback = heapq.heappop(self.queue)
+            if after_id in self.cancelled:
+                self.cancelled.discard(after_id)
+                continue
+            self.current = max(self.current, when)
+            callback()
+            if self.on_fire:
+                self.on_fire()
+        self.current = max(self.current, deadline)
+
+
+# Relevé des sessions indépendant du journal : horaires pris sur l'horloge virtuelle,
+# aux actions du pilote et après chaque tick qui change la phase
+class SessionRecorder:
+    def __init__(self, clock, timer):
+        self.clock = clock
+        self.timer = timer
+        self.sessions = []
+        self.opened = None
+        self.is_work = True
+
+    def started(self):
+        if self.opened is None:
+            self.opened = self.clock.now()
+            self.is_work = self.timer.is_work_phase
+
+    def stopped(self):
+        if self.opened is not None:
+            self.sessions.append((self.opened, self.clock.now(), self.is_work, False))
+            self.opened = None
+
+    def tick(self):
+        if self.opened is not None and self.timer.is_work_phase != self.is_work:
+            self.sessions.append((self.opened, self.clock.now(), self.is_work, True))
+            self.opened = self.clock.now()
+            self.is_work = self.timer.is_work_phase
+
+
+def simulate(days, work_minutes=25, break_minutes=5, day_hours=8, stops_per_day=2,
+             jitter_ms=50, seed=0, workdir=None, start=None):
+    workdir = workdir or tempfile.mkdtemp(prefix="deepwork_sim_")
+    os.makedirs(workdir, exist_ok=True)
+    log_file = os.path.join(workdir, "deepwork_log.csv")
+    config_file = os.path.join(workdir, "config.json")
+    if os.path.exists(log_file):
+        os.remove(log_file)
+
+    start = start or datetime(2025, 1, 6, 9, 0)
+    clock = VirtualClock(start.timestamp(), jitter_ms=jitter_ms, seed=seed)
+    rng = random.Random(seed)
+    # Minuteur sans affichage : même logique de phases, aucun widget ni son
+    timer = TimerCore(clock, config_file, log_file,
+                      config={"work_minutes": work_minutes, "break_minutes": break_minutes})
+    recorder = SessionRecorder(clock, timer)
+    clock.on_fire = recorder.tick
+    stops = 0
+
+    def start_timer():
+        recorder.started()
+        timer.start_timer()
+
+    def stop_timer():
+        recorder.stopped()
+        timer.stop_timer()
+
+    for day in range(days):
+        day_start = (start + timedelta(days=day)).timestamp()
+        day_end = day_start + day_hours * 3600
+        clock.run_until(day_start)
+        start_timer()
+        # Interruptions de l'utilisateur : arrêt puis reprise quelques minutes plus tard
+        for stop_at in sorted(rng.uniform(day_start, day_end) for _ in range(stops_per_day)):
+            if stop_at <= clock.now():
+                continue
+            clock.run_until(stop_at)
+            stop_timer()
+            stops += 1
+            clock.run_until(min(day_end, clock.now() + rng.uniform(30, 20 * 60)))
+            start_timer()
+        clock.run_until(day_end)
+        stop_timer()
+
+    return {
+        "sessions": recorder.sessions,
+        "durations": {True: work_minutes * 60, False: break_minutes * 60},
+        "log_file": log_file,
+        "days": days,
+        "stops": stops,
+        "pending": len(clock.queue) - len(clock.cancelled),
+    }
+
+
+def check_invariants(result, jitter_ms=50):
+    sessions = result["sessions"]
+    errors = []
+
+    # Dérive : une phase terminée dure le temps configuré, à un tick près
+    tolerance = 1 + jitter_ms / 1000
+    for i, (start, end, is_work, completed) in enumerate(sessions):
+        configured = result["durations"][is_work]
+        if completed and not configured - 0.5 <= end - start <= configured + tolerance:
+            errors.append(f"dérive phase {i} : {end - start:.3f}s pour {configured}s configurées")
+
+    # Chaque ligne du journal correspond à la session relevée sur l'horloge
+    rows = 0
+    logged = 0
+    previous_end = None
+    for i, record in enumerate(iter_log(result["log_file"])):
+        rows += 1
+        logged += record["seconds"]
+        if i < len(sessions):
+            start, end, is_work, completed = sessions[i]
+            if abs(record["start"] - start) > 0.5 or abs(record["end"] - end) > 0.5:
+                errors.append(f"ligne {i} : {record['start']}-{record['end']} au lieu de {start:.1f}-{end:.1f}")
+            if record["phase"] != (PHASE_WORK if is_work else PHASE_BREAK) or record["completed"] != completed:
+                errors.append(f"ligne {i} : {record['phase']}/{record['completed']} au lieu de "
+                              f"{PHASE_WORK if is_work else PHASE_BREAK}/{completed}")
+        if previous_end is not None and record["start"] < previous_end:
+            errors.append(f"ligne {i} : commence avant la fin de la précédente")
+        previous_end = record["end"]
+
+    # Totaux : le journal reflète exactement les sessions relevées (à l'arrondi près)
+    if rows != len(sessions):
+        errors.append(f"{rows} lignes pour {len(sessions)} sessions relevées")
+    measured = sum(end - start for start, end, _, _ in sessions)
+    if abs(logged - measured) > rows:
+        errors.append(f"total journal {logged}s au lieu de {measured:.0f}s")
+
+    # Alternance travail/repos des sessions terminées
+    finished = [is_work for _, _, is_work, completed in sessions if completed]
+    if any(is_work != (i % 2 == 0) for i, is_work in enumerate(finished)):
+        errors.append("les phases terminées n'alternent pas travail/repos")
+
+    if result["pending"]:
+        errors.append(f"{result['pending']} ticks encore planifiés après l'arrêt")
+
+    return errors
+
+
+# Migration v1 -> v2 : journal mixte, interrompu en cours de route puis repris
+def check_upgrade(workdir=None, rows=10500, interrupt_at=5500, batch=500):
+    workdir = workdir or tempfile.mkdtemp(prefix="deepwork_upgrade_")
+    os.makedirs(workdir, exist_ok=True)
+    path = os.path.join(workdir, "deepwork_log.csv")
+    reference = os.path.join(workdir, "reference.csv")
+    for leftover in (path + ".v2.tmp", path + ".upgrade", path + ".upgrade.tmp"):
+        if os.path.exists(leftover):
+            os.remove(leftover)
+    errors = []
+
+    stamp = datetime(2025, 1, 6, 9, 0)
+    with open(path, "w", newline="") as f:
+        for i in range(rows):
+            minutes = 25 if i % 2 == 0 else 5
+            stamp += timedelta(minutes=minutes)
+            f.write(f"{stamp:%Y-%m-%d %H:%M:%S},{'Travail' if i % 2 == 0 else 'Repos'},{minutes}\n")
+    # Lignes v2 ajoutées par une version récente avant la migration
+    end = int(stamp.timestamp())
+    append_log({"start": end, "end": end + 1500, "seconds": 1500, "phase": PHASE_WORK, "completed": True}, path)
+    append_log({"start": end + 1500, "end": end + 1620, "seconds": 120, "phase": PHASE_BREAK, "completed": False}, path)
+    source = os.path.join(workdir, "source.csv")
+    shutil.copy(path, source)
+    shutil.copy(path, reference)
+    upgrade_log(reference, batch)
+
+    before = list(iter_log(path))
+    if len(before) != rows + 2:
+        errors.append(f"migration : {len(before)} enregistrements lus au lieu de {rows + 2}")
+
+    def interrupt(count):
+        if count >= interrupt_at:
+            raise KeyboardInterrupt
+
+    # Crash après le dernier point de reprise (lignes en trop dans le fichier temporaire),
+    # puis crash pendant l'écriture du point de reprise (fichier .upgrade tronqué)
+    for crash in ("lignes", "point de reprise"):
+        shutil.copy(source, path)
+        try:
+            upgrade_log(path, batch, interrupt)
+            errors.append(f"migration ({crash}) : l'interruption n'a pas eu lieu")
+        except KeyboardInterrupt:
+            if not os.path.exists(path + ".v2.tmp"):
+                errors.append(f"migration ({crash}) : fichier temporaire absent après interruption")
+            elif crash == "lignes":
+                with open(path + ".v2.tmp", "a", newline="") as f:
+                    f.write("1736154000,1736155500,1500,work,1\n17361")
+            else:
+                with open(path + ".upgrade", "w") as f:
+                    f.write('{"src": 4')
+        upgrade_log(path, batch)
+
+        with open(path, "rb") as a, open(reference, "rb") as b:
+            if a.read() != b.read():
+                errors.append(f"migration ({crash}) : résultat repris différent d'une migration d'une traite")
+        for leftover in (path + ".v2.tmp", path + ".upgrade", path + ".upgrade.tmp"):
+            if os.path.exists(leftover):
+                errors.append(f"migration ({crash}) : {os.path.basename(leftover)} laissé sur le disque")
+        if list(iter_log(path)) != before:
+            errors.append(f"migration ({crash}) : enregistrements différents avant et après")
+    if upgrade_log(path, batch):
+        errors.append("migration : journal v2 converti une seconde fois")
+
+    # Les anciens scripts ajoutent encore des lignes v1 à un journal v2
+    with open(path, "a", newline="") as f:
+        f.write(f"{stamp:%Y-%m-%d %H:%M:%S},Travail,25\r\n")
+    if not upgrade_log(path, batch):
+        errors.append("migration : ligne v1 ajoutée à un journal v2 non convertie")
+    elif len(list(iter_log(path))) != rows + 3:
+        errors.append("migration : ligne v1 ajoutée perdue à la conversion")
+    return errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulation accélérée du Deep Work Timer")
+    parser.add_argument("--days", type=int, default=90)
+    parser.add_argument("--work", type=int, default=25, help="Temps de travail (min)")
+    parser.add_argument("--rest", type=int, default=5, help="Temps de repos (min)")
+    parser.add_argument("--hours", type=float, default=8, help="Heures de travail par jour")
+    parser.add_argument("--stops", type=int, default=2, help="Arrêts/reprises par jour")
+    parser.add_argument("--jitter", type=float, default=50, help="Retard max d'un tick (ms)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--dir", default=None, help="Dossier du journal simulé")
+    args = parser.parse_args()
+
+    t0 = time.perf_counter()
+    result = simulate(args.days, args.work, args.rest, args.hours, args.stops,
+                      args.jitter, args.seed, args.dir)
+    t1 = time.perf_counter()
+    errors = check_invariants(result, args.jitter)
+    t2 = time.perf_counter()
+    labels, durations, colors = session_stats(iter_log(result["log_file"]))
+    t3 = time.perf_counter()
+    errors += check_upgrade(args.dir and os.path.join(args.dir, "upgrade"))
+    t4 = time.perf_counter()
+    if len(labels) != len(result["sessions"]):
+        errors.append(f"statistiques : {len(labels)} barres pour {len(result['sessions'])} sessions")
+
+    sessions = sum(1 for *_, completed in result["sessions"] if completed)
+    print(f"{args.days} jours simulés en {t1 - t0:.2f}s : {sessions} sessions, {result['stops']} arrêts")
+    print(f"Lecture du journal et vérifications : {t2 - t1:.3f}s ({result['log_file']})")
+    print(f"Agrégation des statistiques : {t3 - t2:.3f}s ({sum(durations):.0f} min)")
+    print(f"Migration v1 -> v2 interrompue puis reprise : {t4 - t3:.3f}s")
+    if errors:
+        for error in errors[:20]:
+            print("ERREUR :", error)
+        raise SystemExit(1)
+    print("Invariants OK")
+
+
+if __name__ == "__main__":
+    main()
@@ -162,7 +162,8 @@ class DeepWorkTimer:
         try:
             with open(LOG_FILE, "r") as f:
                 reader = csv.reader(f)
-                data = list(reader)
+                # Ignorer l'en-tête et les lignes v2 écrites par la V3
+                data = [row for row in reader if len(row) == 3 and row[2].isdigit()]
         except FileNotFoundError:
             messagebox.showinfo("Statistiques", "Aucune donnée disponible.")
             return
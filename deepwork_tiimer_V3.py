@@ -9,43 +9,16 @@ import matplotlib.pyplot as plt
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 import pygame
 
-LOG_FILE = "deepwork_log.csv"
-CONFIG_FILE = "config.json"
-
-# Couleurs par défaut
-DEFAULT_COLORS = {
-    "work_bg": "#924040",   # Rouge
-    "work_btn": "#556027",  # Vert
-    "break_bg": "#3713af",  # Bleu
-    "btn_text": "#ffffff"
-}
-
-# Charger ou créer config
-def load_config():
-    try:
-        with open(CONFIG_FILE, "r") as f:
-            config = json.load(f)
-    except FileNotFoundError:
-        config = {"work_minutes": 25, "break_minutes": 5, "colors": DEFAULT_COLORS, "theme": "dark", "mini_alpha": 1.0}
-    if "colors" not in config:
-        config["colors"] = DEFAULT_COLORS.copy()
-    if "theme" not in config:
-        config["theme"] = "dark"
-    if "mini_alpha" not in config:
-        config["mini_alpha"] = 1.0
-    return config
-
-def save_config(config):
-    with open(CONFIG_FILE, "w") as f:
-        json.dump(config, f, indent=4)
-
-class DeepWorkTimer:
-    def __init__(self, root):
+from deepwork_core import (CONFIG_FILE, DEFAULT_COLORS, LOG_COLUMNS, LOG_FILE, PHASE_LABELS,
+                           TimerCore, TkClock, format_log_row, iter_log, save_config, session_stats, upgrade_log)
+
+class DeepWorkTimer(TimerCore):
+    def __init__(self, root, clock=None, config_file=CONFIG_FILE, log_file=LOG_FILE):
         self.root = root
         self.root.title("Deep Work Timer")
 
-        # Charger config
-        self.config = load_config()
+        # Charger config et état du minuteur
+        super().__init__(clock or TkClock(root), config_file, log_file)
 
         # Appliquer le thème clair/sombre
         ctk.set_appearance_mode(self.config["theme"])
@@ -53,10 +26,6 @@ class DeepWorkTimer:
         # Variables
         self.work_minutes = ctk.IntVar(value=self.config["work_minutes"])
         self.break_minutes = ctk.IntVar(value=self.config["break_minutes"])
-        self.remaining_time = 0
-        self.total_time = 0
-        self.is_running = False
-        self.is_work_phase = True
 
         # Mini-widget
         self.mini_widget = None
@@ -99,7 +68,8 @@ class DeepWorkTimer:
         root.config(menu=self.menu)
 
         file_menu = tk.Menu(self.menu, tearoff=0)
-        file_menu.add_command(label="Quitter", command=self.root.quit)
+        file_menu.add_command(label="Mettre à jour le journal", command=self.upgrade_log)
+        file_menu.add_command(label="Quitter", command=self.quit_app)
         self.menu.add_cascade(label="Fichier", menu=file_menu)
 
         options_menu = tk.Menu(self.menu, tearoff=0)
@@ -124,6 +94,9 @@ class DeepWorkTimer:
         self.root.bind("<F11>", lambda e: self.toggle_fullscreen())
         self.root.bind("<Control-t>", lambda e: self.toggle_theme())
 
+        # Fermer la fenêtre enregistre aussi la session en cours
+        self.root.protocol("WM_DELETE_WINDOW", self.quit_app)
+
     def apply_theme(self):
         colors = self.config["colors"]
         if self.is_work_phase:
@@ -142,7 +115,7 @@ class DeepWorkTimer:
     def change_theme(self, mode):
         ctk.set_appearance_mode(mode)
         self.config["theme"] = mode
-        save_config(self.config)
+        save_config(self.config, self.config_file)
         self.apply_theme()
         # Mise à jour instantanée du mini-widget
         if self.mini_widget:
@@ -159,48 +132,23 @@ class DeepWorkTimer:
 
     def set_mini_alpha(self, value):
         self.config["mini_alpha"] = value
-        save_config(self.config)
+        save_config(self.config, self.config_file)
         if self.mini_widget:
             self.mini_widget.attributes("-alpha", value)
 
-    def start_timer(self):
-        if not self.is_running:
-            self.is_running = True
-            minutes = self.work_minutes.get() if self.is_work_phase else self.break_minutes.get()
-            self.remaining_time = minutes * 60
-            self.total_time = self.remaining_time
-            self.config["work_minutes"] = self.work_minutes.get()
-            self.config["break_minutes"] = self.break_minutes.get()
-            save_config(self.config)
-            self.update_timer()
-
-    def stop_timer(self):
-        self.is_running = False
-        self.draw_circle(0)
-        if self.mini_widget:
-            self.draw_mini_circle(0)
+    def notify_phase_end(self):
+        # is_work_phase désigne déjà la nouvelle phase
+        if self.is_work_phase:
+            pygame.mixer.Sound(self.break_end_sound).play()
+        else:
+            pygame.mixer.Sound(self.work_end_sound).play()
+        phase = "Travail" if self.is_work_phase else "Repos"
+        messagebox.showinfo("Fin de session", f"Session terminée ! Passez en mode {phase}.")
 
-    def update_timer(self):
-        if self.is_running and self.remaining_time > 0:
-            mins, secs = divmod(self.remaining_time, 60)
-            percent = self.remaining_time / self.total_time
-            self.draw_circle(percent, f"{mins:02d}:{secs:02d}")
-            if self.mini_widget:
-                self.draw_mini_circle(percent, f"{mins:02d}:{secs:02d}")
-            self.remaining_time -= 1
-            self.root.after(1000, self.update_timer)
-        elif self.is_running:
-            self.log_session()
-            if self.is_work_phase:
-                pygame.mixer.Sound(self.work_end_sound).play()
-            else:
-                pygame.mixer.Sound(self.break_end_sound).play()
-            self.is_work_phase = not self.is_work_phase
-            self.apply_theme()
-            phase = "Travail" if self.is_work_phase else "Repos"
-            messagebox.showinfo("Fin de session", f"Session terminée ! Passez en mode {phase}.")
-            self.is_running = False
-            self.start_timer()
+    def show_time(self, percent, time_str="00:00"):
+        self.draw_circle(percent, time_str)
+        if self.mini_widget:
+            self.draw_mini_circle(percent, time_str)
 
     def draw_circle(self, percent, time_str="00:00"):
         self.timer_canvas.delete("all")
@@ -223,31 +171,27 @@ class DeepWorkTimer:
         mins, secs = divmod(self.remaining_time, 60)
         self.draw_circle(percent, f"{mins:02d}:{secs:02d}")
 
-    def log_session(self):
-        phase = "Travail" if self.is_work_phase else "Repos"
-        duration = self.work_minutes.get() if self.is_work_phase else self.break_minutes.get()
-        with open(LOG_FILE, "a", newline="") as f:
-            writer = csv.writer(f)
-            writer.writerow([datetime.now().strftime("%Y-%m-%d %H:%M:%S"), phase, duration])
-
-    def show_stats(self):
+    def upgrade_log(self):
         try:
-            with open(LOG_FILE, "r") as f:
-                reader = csv.reader(f)
-                data = list(reader)
-        except FileNotFoundError:
-            messagebox.showinfo("Statistiques", "Aucune donnée disponible.")
+            upgraded = upgrade_log(self.log_file)
+        except (OSError, ValueError) as e:
+            messagebox.showerror("Journal", f"Échec de la mise à jour du journal : {e}")
             return
+        if upgraded:
+            messagebox.showinfo("Journal", "Journal converti au format v2.")
+        else:
+            messagebox.showinfo("Journal", "Journal déjà à jour.")
 
+    def show_stats(self):
+        data = list(iter_log(self.log_file))
         if not data:
             messagebox.showinfo("Statistiques", "Aucune donnée disponible.")
             return
 
-        labels = [row[1] for row in data]
-        durations = [int(row[2]) for row in data]
+        labels, durations, colors = session_stats(data)
 
         fig, ax = plt.subplots(figsize=(6, 4))
-        ax.bar(range(len(durations)), durations, tick_label=labels)
+        ax.bar(range(len(durations)), durations, tick_label=labels, color=colors)
         ax.set_ylabel("Durée (min)")
         ax.set_title("Historique Deep Work")
 
@@ -269,11 +213,16 @@ class DeepWorkTimer:
         if filepath.endswith(".csv"):
             with open(filepath, "w", newline="") as f:
                 writer = csv.writer(f)
-                writer.writerows(data)
+                writer.writerow(LOG_COLUMNS)
+                writer.writerows(format_log_row(r) for r in data)
             messagebox.showinfo("Export réussi", f"Données exportées en CSV : {filepath}")
 
         elif filepath.endswith(".json"):
-            json_data = [{"datetime": row[0], "phase": row[1], "duration": int(row[2])} for row in data]
+            # "datetime" (fin de session), "phase" (Travail/Repos) et "duration" (min) gardent
+            # leur sens v1 ; la phase v2 (work/break) est dans "phase_id"
+            json_data = [dict(r, datetime=datetime.fromtimestamp(r["end"]).strftime("%Y-%m-%d %H:%M:%S"),
+                              phase=PHASE_LABELS[r["phase"]], phase_id=r["phase"],
+                              duration=round(r["seconds"] / 60)) for r in data]
             with open(filepath, "w") as f:
                 json.dump(json_data, f, indent=4)
             messagebox.showinfo("Export réussi", f"Données exportées en JSON : {filepath}")
@@ -283,7 +232,7 @@ class DeepWorkTimer:
             color = colorchooser.askcolor(title=f"Choisir couleur pour {key}")[1]
             if color:
                 self.config["colors"][key] = color
-                save_config(self.config)
+                save_config(self.config, self.config_file)
                 self.apply_theme()
                 if self.mini_widget:
                     self.draw_mini_circle(0, "00:00")
@@ -309,6 +258,10 @@ class DeepWorkTimer:
     def show_about(self):
         messagebox.showinfo("À propos", "Deep Work Timer\nAvec mini-widget flottant Play/Pause\nDéveloppé en Python")
 
+    def quit_app(self):
+        self.stop_timer()
+        self.root.quit()
+
     def toggle_fullscreen(self):
         self.root.attributes("-fullscreen", not self.root.attributes("-fullscreen"))
 